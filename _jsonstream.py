@@ -0,0 +1,53 @@
+"""
+Helpers shared by rdb_to_json.py and dump_to_conversations.py for writing a
+large indent=2 JSON document piece by piece, byte-identical to a single
+json.dump(..., ensure_ascii=False, indent=2) of the whole thing.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+from typing import IO, Any, Iterator
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    # orjson is optional; fall back to the (slower) stdlib serializer.
+    orjson = None  # type: ignore[assignment]
+
+
+def json_dumps(obj: Any, fast: bool = True) -> bytes:
+    # fast=False forces the stdlib serializer, for values orjson would not
+    # render exactly like json.dumps (see dump_to_conversations._load_session).
+    if fast and orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            pass  # e.g. nested deeper than orjson's serializer allows (254)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def indent(data: bytes, depth: int) -> bytes:
+    # Re-indent the continuation lines of a serialized value so it can be
+    # spliced into the output at nesting level `depth` (JSON strings never
+    # hold a raw newline, so this only touches structural whitespace).
+    return data.replace(b"\n", b"\n" + b"  " * depth)
+
+
+@contextlib.contextmanager
+def atomic_output(path: str) -> Iterator[IO[bytes]]:
+    # Write to a sibling temp file and move it over `path` only once the whole
+    # document is out, so a failed run never clobbers an existing good file.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
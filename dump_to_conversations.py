@@ -11,19 +11,127 @@ Output shape:
 We only include keys that look like chat sessions:
   chat:session_<session_id>
 
+(or <prefix><session_id> for each --session-prefix given).
+
 Usage:
   python3 dump_to_conversations.py --in dump.json --out conversations.json
+  python3 dump_to_conversations.py --session-prefix chat:session_ --session-prefix support:session_
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from itertools import islice
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    # orjson is optional; fall back to the (slower) stdlib parser/serializer.
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import ijson  # type: ignore
+except ImportError:  # pragma: no cover
+    # ijson is optional; without it the whole document is loaded into memory.
+    ijson = None  # type: ignore[assignment]
+
+from _jsonstream import atomic_output, indent, json_dumps
+
+
+_SESSION_PREFIX = "chat:session_"
+
+# Output chunks gathered per write; well under the usual IOV_MAX of 1024.
+_WRITE_BATCH = 256
+
+
+# Sessions orjson cannot round-trip exactly like the stdlib hold a number (a
+# digit run right after ':', '[' or ',') with 16+ integer digits (integers
+# beyond 64 bits become floats; 1e+16 vs 1e16), an exponent, or a tiny
+# decimal (stdlib prints 1e-05, orjson 1e-5). Anchoring on the delimiter keeps
+# text such as "\u00e9" from matching; a match inside a string is harmless,
+# it only takes the slower path.
+_ORJSON_UNSAFE_RE = re.compile(r"[:\[,]\s*-?(?:\d{16}|\d+(?:\.\d+)?[eE]|0\.0000)")
+
+
+def _json_loads(data: Any) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity, which the stdlib parser accepts
+    return json.loads(data)
+
+
+def _load_session(raw: str) -> Tuple[Any, bool]:
+    """
+    Parse one session value exactly as json.loads would.
+
+    Returns (value, fast): fast is True when orjson parsed it, meaning orjson
+    can also serialize it to the exact bytes json.dumps would produce.
+    """
+    if orjson is not None and not _ORJSON_UNSAFE_RE.search(raw):
+        try:
+            return orjson.loads(raw), True
+        except orjson.JSONDecodeError:
+            pass  # NaN/Infinity/1e400: orjson rejects them, the stdlib doesn't
+    return json.loads(raw), False
+
+
+def _write_chunks(f: IO[bytes], chunks: List[bytes]) -> None:
+    """
+    Write chunks in order with a single gather write where os.writev exists.
+
+    Avoids concatenating them into one large bytes object first. The caller
+    must not mix this with buffered f.write() calls on the same file.
+    """
+    if not hasattr(os, "writev"):
+        f.writelines(chunks)
+        return
+    fd = f.fileno()
+    i = 0
+    while i < len(chunks):
+        n = os.writev(fd, chunks[i:])
+        # Handle short writes: skip what was fully written, trim the rest.
+        while i < len(chunks) and n >= len(chunks[i]):
+            n -= len(chunks[i])
+            i += 1
+        if n:
+            chunks[i] = chunks[i][n:]
 
 
-_SESSION_KEY_RE = re.compile(r"^chat:session_(?P<sid>.+)$")
+_NOT_A_LIST = "Unexpected input: doc['db']['0']['entries'] is not a list"
+
+
+def _entries_prefix_is_list(f: IO[bytes]) -> bool:
+    # ijson.items() silently yields nothing when the prefix holds a map or a
+    # scalar, so look at the first db.0.entries event once up front (only the
+    # small "meta" block precedes it in rdb_to_json output). A missing key
+    # counts as an empty list, as in the non-streaming path.
+    for prefix, event, _ in ijson.parse(f):
+        if prefix == "db.0.entries":
+            return event == "start_array"
+    return True
+
+
+def _iter_entries(f: IO[bytes]) -> Iterator[Any]:
+    if ijson is not None:
+        # Stream doc["db"]["0"]["entries"] one item at a time instead of
+        # materializing the whole dump. Rewind after the type check and hand
+        # ijson the file itself, which keeps it on its C fast path.
+        if not _entries_prefix_is_list(f):
+            raise SystemExit(_NOT_A_LIST)
+        f.seek(0)
+        return ijson.items(f, "db.0.entries.item", use_float=True)
+
+    doc = _json_loads(f.read())
+    entries = doc.get("db", {}).get("0", {}).get("entries", [])
+    if not isinstance(entries, list):
+        raise SystemExit(_NOT_A_LIST)
+    return iter(entries)
 
 
 def _get_key_string(entry: Dict[str, Any]) -> Optional[str]:
@@ -36,6 +144,10 @@ def _get_key_string(entry: Dict[str, Any]) -> Optional[str]:
         if enc == "base64" and isinstance(data, str):
             # We can't safely decode arbitrary bytes to a string key.
             return f"base64:{data}"
+        b64 = k.get("b64")
+        if isinstance(b64, str):
+            # Binary key from an export made with --compact-encoding.
+            return f"base64:{b64}"
     if isinstance(k, str):
         return k
     return None
@@ -43,6 +155,9 @@ def _get_key_string(entry: Dict[str, Any]) -> Optional[str]:
 
 def _get_utf8_value_string(entry: Dict[str, Any]) -> Optional[str]:
     v = entry.get("value")
+    if isinstance(v, str):
+        # Export made with --compact-encoding: UTF-8 values are bare strings.
+        return v
     if not isinstance(v, dict):
         return None
     enc = v.get("encoding")
@@ -55,75 +170,104 @@ def _get_utf8_value_string(entry: Dict[str, Any]) -> Optional[str]:
 def _looks_like_conversation(obj: Any) -> bool:
     if not isinstance(obj, list) or not obj:
         return False
-    # Heuristic: messages are dicts with role/content.
-    n = 0
-    for item in obj[:10]:
-        if isinstance(item, dict) and "role" in item and "content" in item:
-            n += 1
-    return n >= 1
+    # Heuristic: at least one of the first 10 items is a role/content message.
+    return any(
+        isinstance(item, dict) and "role" in item and "content" in item for item in islice(obj, 10)
+    )
+
+
+def _iter_session_entries(
+    entries: Iterator[Any],
+    stats: Dict[str, int],
+    prefixes: Tuple[str, ...] = (_SESSION_PREFIX,),
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (session_id, raw_value) for every chat-session entry with a UTF-8 value.
+
+    A session key is any of `prefixes` followed by a non-empty session id.
+    Rejected entries are tallied in stats["skipped"] / stats["not_session_key"].
+    """
+    # Prefixes are literal, so str.startswith + slicing replaces a regex; with a
+    # tuple, one C-level startswith call tests every prefix at once. Longest
+    # first, so overlapping prefixes resolve to the most specific one.
+    prefixes = tuple(sorted(set(prefixes), key=len, reverse=True))
+    lens = [(p, len(p)) for p in prefixes]
+    single_len = lens[0][1] if len(lens) == 1 else None
+    skipped = not_session_key = 0
+    try:
+        for entry in entries:
+            if not isinstance(entry, dict):
+                skipped += 1
+                continue
+
+            key_str = _get_key_string(entry)
+            if not key_str:
+                skipped += 1
+                continue
+
+            if not key_str.startswith(prefixes):
+                not_session_key += 1
+                continue
+            plen = single_len or next(n for p, n in lens if key_str.startswith(p))
+            if len(key_str) == plen:
+                not_session_key += 1
+                continue
+
+            raw = _get_utf8_value_string(entry)
+            if raw is None:
+                skipped += 1
+                continue
+
+            yield key_str[plen:], raw
+    finally:
+        stats["skipped"] += skipped
+        stats["not_session_key"] += not_session_key
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="Convert dump.json to conversations.json with session_id.")
     ap.add_argument("--in", dest="in_path", default="dump.json")
     ap.add_argument("--out", dest="out_path", default="conversations.json")
+    ap.add_argument(
+        "--session-prefix",
+        dest="session_prefixes",
+        action="append",
+        help=f"Key prefix that marks a chat session; repeatable (default: {_SESSION_PREFIX})",
+    )
     args = ap.parse_args(argv)
 
-    with open(args.in_path, "r", encoding="utf-8") as f:
-        doc = json.load(f)
-
-    entries = doc.get("db", {}).get("0", {}).get("entries", [])
-    if not isinstance(entries, list):
-        raise SystemExit("Unexpected input: doc['db']['0']['entries'] is not a list")
-
-    out: List[Dict[str, Any]] = []
-    skipped = 0
-    parsed_fail = 0
-    not_session_key = 0
-    not_conversation = 0
-
-    for entry in entries:
-        if not isinstance(entry, dict):
-            skipped += 1
-            continue
-
-        key_str = _get_key_string(entry)
-        if not key_str:
-            skipped += 1
-            continue
-
-        m = _SESSION_KEY_RE.match(key_str)
-        if not m:
-            not_session_key += 1
-            continue
-        session_id = m.group("sid")
-
-        raw = _get_utf8_value_string(entry)
-        if raw is None:
-            skipped += 1
-            continue
-
-        try:
-            parsed = json.loads(raw)
-        except Exception:
-            parsed_fail += 1
-            continue
+    written = 0
+    stats = {"skipped": 0, "not_session_key": 0, "parsed_fail": 0, "not_conversation": 0}
 
-        if not _looks_like_conversation(parsed):
-            not_conversation += 1
-            continue
+    with open(args.in_path, "rb") as f, atomic_output(args.out_path) as out:
+        chunks: List[bytes] = [b"["]
+        for session_id, raw in _iter_session_entries(
+            _iter_entries(f), stats, tuple(args.session_prefixes or (_SESSION_PREFIX,))
+        ):
+            try:
+                parsed, fast = _load_session(raw)
+            except Exception:
+                stats["parsed_fail"] += 1
+                continue
 
-        out.append({"session_id": session_id, "conversation": parsed})
+            if not _looks_like_conversation(parsed):
+                stats["not_conversation"] += 1
+                continue
 
-    with open(args.out_path, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+            chunks.append(b",\n" if written else b"\n")
+            record = {"session_id": session_id, "conversation": parsed}
+            chunks.append(b"  " + indent(json_dumps(record, fast), 1))
+            written += 1
+            if len(chunks) >= _WRITE_BATCH:
+                _write_chunks(out, chunks)
+                chunks = []
+        chunks.append(b"\n]" if written else b"]")
+        _write_chunks(out, chunks)
 
     print(f"wrote: {args.out_path}")
-    print(f"conversations: {len(out)}")
-    print(f"skipped: {skipped}")
-    print(f"not_session_key: {not_session_key}")
-    print(f"parsed_fail: {parsed_fail}")
-    print(f"not_conversation: {not_conversation}")
+    print(f"conversations: {written}")
+    for name, count in stats.items():
+        print(f"{name}: {count}")
     return 0
 
 
@@ -11,8 +11,17 @@ Why this approach:
 Usage:
   python3 rdb_to_json.py --rdb ./dump.rdb --out ./dump.json
 
+  # Only export chat sessions (filtered server-side by SCAN MATCH); they are
+  # all strings, so --assume-string saves the TYPE round trip per batch:
+  python3 rdb_to_json.py --rdb ./dump.rdb --out ./dump.json --key-pattern 'chat:session_*' --assume-string
+
 Requirements:
-  pip install redis
+  pip install redis hiredis
+
+  hiredis (>= 3.2, the oldest redis-py will use) is required for full speed:
+  it parses large multi-bulk replies (HGETALL, LRANGE, XRANGE, ...) 5-10x
+  faster than the pure-Python parser. Without it the export still works but
+  prints a warning.
 
 Notes:
 - If your local redis-server is too old to load the RDB (e.g. "Can't handle RDB
@@ -24,15 +33,20 @@ from __future__ import annotations
 import argparse
 import base64
 import datetime as _dt
-import json
+import functools
+import math
 import os
+import queue
 import shutil
-import socket
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from _jsonstream import atomic_output, indent, json_dumps
 
 try:
     import redis  # type: ignore
@@ -44,17 +58,21 @@ except Exception as e:  # pragma: no cover
     )
     raise
 
+# redis-py selects the hiredis parser on its own when a compatible hiredis is
+# importable; say so when it can't, rather than silently running slower.
+if not redis.utils.HIREDIS_AVAILABLE:  # pragma: no cover
+    print(
+        "hiredis (>= 3.2) not available; falling back to the pure-Python RESP "
+        "parser. Install it for 5-10x faster RESP parsing:\n"
+        "  python3 -m pip install --user 'hiredis>=3.2'\n",
+        file=sys.stderr,
+    )
+
 
 def _utc_now_iso() -> str:
     return _dt.datetime.now(tz=_dt.timezone.utc).isoformat()
 
 
-def _pick_free_port(host: str = "127.0.0.1") -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((host, 0))
-        return int(s.getsockname()[1])
-
-
 def _b64(data: bytes) -> str:
     return base64.b64encode(data).decode("ascii")
 
@@ -62,6 +80,10 @@ def _b64(data: bytes) -> str:
 def _encode_bytes(data: Optional[bytes]) -> Optional[Dict[str, Any]]:
     if data is None:
         return None
+    # Fast path: most values are pure ASCII, and isascii() is far cheaper than
+    # a UTF-8 decode that may have to raise.
+    if data.isascii():
+        return {"encoding": "utf-8", "data": data.decode("ascii")}
     try:
         s = data.decode("utf-8")
         return {"encoding": "utf-8", "data": s}
@@ -69,16 +91,34 @@ def _encode_bytes(data: Optional[bytes]) -> Optional[Dict[str, Any]]:
         return {"encoding": "base64", "data": _b64(data)}
 
 
-def _encode_key(key: bytes) -> Dict[str, Any]:
-    # JSON object keys must be strings; we store keys as objects to be binary-safe.
-    return _encode_bytes(key) or {"encoding": "base64", "data": ""}
+def _encode_bytes_compact(data: Optional[bytes]) -> Any:
+    # --compact-encoding: text is emitted as a bare string, only binary data
+    # gets wrapped ({"b64": ...}), saving the {"encoding", "data"} dict per value.
+    if data is None:
+        return None
+    if data.isascii():
+        return data.decode("ascii")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"b64": _b64(data)}
+
+
+# Encodes one Redis bytes value for JSON: _encode_bytes or _encode_bytes_compact.
+_Encoder = Callable[[Optional[bytes]], Any]
 
 
-def _encode_scalar(v: Any) -> Any:
+def _encode_key(key: bytes, enc: _Encoder = _encode_bytes) -> Any:
+    # JSON object keys must be strings; we store keys as values to be binary-safe.
+    encoded = enc(key)
+    return encoded if encoded is not None else {"encoding": "base64", "data": ""}
+
+
+def _encode_scalar(v: Any, enc: _Encoder = _encode_bytes) -> Any:
     if v is None:
         return None
     if isinstance(v, bytes):
-        return _encode_bytes(v)
+        return enc(v)
     if isinstance(v, (str, int, float, bool)):
         return v
     # Fallback: attempt to stringify safely.
@@ -103,7 +143,7 @@ def _start_redis_for_rdb(
     *,
     redis_server: str,
     rdb_path: str,
-    port: int,
+    unix_socket: str,
     work_dir: str,
 ) -> subprocess.Popen:
     # Redis expects the dump file name to match --dbfilename in --dir.
@@ -121,35 +161,62 @@ def _start_redis_for_rdb(
         "no",
         "--save",
         "",  # disable snapshots while we're exporting
-        "--bind",
-        "127.0.0.1",
-        "--protected-mode",
-        "no",
+        # Client and server share the temp dir, so talk over a Unix socket
+        # (no loopback TCP stack) and don't listen on TCP at all.
         "--port",
-        str(port),
+        "0",
+        "--unixsocket",
+        unix_socket,
+        "--unixsocketperm",
+        "700",
+        # "notice" is the lowest level that still logs the readiness line
+        # _wait_for_redis_ready looks for.
         "--loglevel",
-        "warning",
+        "notice",
     ]
 
+    # redis-server logs to stdout; fold stderr into the same pipe so a single
+    # reader sees everything, in order.
     return subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
+        bufsize=1,
     )
 
 
-def _wait_for_redis_ready(r: "redis.Redis", timeout_s: float = 20.0) -> None:
-    start = time.time()
-    last_err: Optional[Exception] = None
-    while time.time() - start < timeout_s:
+def _wait_for_redis_ready(proc: subprocess.Popen, timeout_s: float = 20.0) -> None:
+    """
+    Block until redis-server logs that it has loaded the RDB and is serving.
+
+    Raises RuntimeError carrying the server output seen so far if the server
+    exits or the timeout expires first.
+    """
+    lines: "queue.Queue[Optional[str]]" = queue.Queue()
+
+    def _pump() -> None:
+        # Keep draining for the life of the server so its log pipe never fills up.
+        for line in proc.stdout:  # type: ignore[union-attr]
+            lines.put(line)
+        lines.put(None)
+
+    threading.Thread(target=_pump, name="redis-server-log", daemon=True).start()
+
+    seen: List[str] = []
+    deadline = time.monotonic() + timeout_s
+    while True:
         try:
-            if r.ping():
-                return
-        except Exception as e:
-            last_err = e
-        time.sleep(0.2)
-    raise RuntimeError(f"Redis did not become ready in {timeout_s}s. Last error: {last_err}")
+            line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            raise RuntimeError(f"Redis did not become ready in {timeout_s}s.\n{''.join(seen)}")
+        if line is None:
+            raise RuntimeError(f"redis-server exited with code {proc.wait()}.\n{''.join(seen)}")
+        seen.append(line)
+        # "Ready to accept connections" since Redis 4.0; older servers log
+        # "The server is now ready to accept connections ...".
+        if "ready to accept connections" in line.lower():
+            return
 
 
 def _collect_db_indexes(r: "redis.Redis") -> List[int]:
@@ -168,85 +235,399 @@ def _collect_db_indexes(r: "redis.Redis") -> List[int]:
         return [0]
 
 
-def _scan_keys(r: "redis.Redis", count: int = 1000) -> List[bytes]:
+def _scan_keys(r: "redis.Redis", pattern: bytes = b"*", count: int = 1000) -> Iterator[List[bytes]]:
+    # Yield one SCAN batch at a time so each batch can be read with pipelines.
+    # MATCH is applied server-side, so rejected keys never cross the socket.
     cursor = 0
-    keys: List[bytes] = []
     while True:
-        cursor, batch = r.scan(cursor=cursor, count=count)
-        keys.extend(batch)
+        cursor, batch = r.scan(cursor=cursor, match=pattern, count=count)
+        if batch:
+            yield batch
         if cursor == 0:
             break
-    return keys
 
 
-def _read_key_entry(r: "redis.Redis", key: bytes) -> Dict[str, Any]:
-    key_type = r.type(key)
-    if isinstance(key_type, bytes):
-        key_type_str = key_type.decode("utf-8", errors="replace")
-    else:
-        key_type_str = str(key_type)
+def _encode_hash(m: Dict[bytes, bytes], enc: _Encoder) -> List[Dict[str, Any]]:
+    # Preserve binary safety by storing items as an array.
+    return [{"field": enc(f), "value": enc(v)} for f, v in m.items()]
+
+
+def _encode_list(vals: List[bytes], enc: _Encoder) -> List[Any]:
+    return [enc(v) for v in vals]
+
+
+def _encode_score(score: float) -> Any:
+    # Scores may be +/-inf, which has no JSON number form; use Redis' own spelling.
+    if math.isinf(score):
+        return "inf" if score > 0 else "-inf"
+    return score
 
-    ttl_ms: Optional[int]
-    try:
-        pttl = int(r.pttl(key))
-        ttl_ms = None if pttl < 0 else pttl
-    except Exception:
-        ttl_ms = None
 
-    entry: Dict[str, Any] = {
-        "key": _encode_key(key),
-        "type": key_type_str,
-        "ttl_ms": ttl_ms,
+def _encode_zset(vals: List[Tuple[bytes, float]], enc: _Encoder) -> List[Dict[str, Any]]:
+    return [{"member": enc(m), "score": _encode_score(s)} for m, s in vals]
+
+
+def _encode_stream(items: List[Tuple[bytes, Dict[bytes, bytes]]], enc: _Encoder) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": _encode_scalar(item_id, enc),
+            "fields": [{"field": enc(f), "value": enc(v)} for f, v in fields.items()],
+        }
+        for item_id, fields in items
+    ]
+
+
+def _next_stream_id(item_id: bytes) -> bytes:
+    # Smallest ID strictly greater than item_id ("ms-seq"); works on any server
+    # version, unlike the exclusive "(" range syntax added in Redis 6.2.
+    ms, _, seq = item_id.partition(b"-")
+    if int(seq) >= 2**64 - 1:
+        return b"%d-0" % (int(ms) + 1)
+    return b"%s-%d" % (ms, int(seq) + 1)
+
+
+def _iter_xrange(
+    r: "redis.Redis", key: bytes, batch: int = 1000, start: bytes = b"-"
+) -> Iterator[List[Tuple[bytes, Dict[bytes, bytes]]]]:
+    cursor = start
+    while True:
+        items = r.xrange(key, min=cursor, max="+", count=batch)
+        if not items:
+            break
+        yield items
+        if len(items) < batch:
+            break
+        cursor = _next_stream_id(items[-1][0])
+
+
+def _encode_dump(payload: Optional[bytes]) -> Dict[str, Any]:
+    return {
+        "encoding": "redis-dump-base64",
+        "data": _b64(payload) if payload is not None else None,
     }
 
-    try:
-        if key_type_str == "string":
-            entry["value"] = _encode_bytes(r.get(key))
-        elif key_type_str == "hash":
-            m = r.hgetall(key)
-            # Preserve binary safety by storing items as an array.
-            entry["value"] = [
-                {"field": _encode_bytes(f), "value": _encode_bytes(v)} for f, v in m.items()
-            ]
-        elif key_type_str == "list":
-            vals = r.lrange(key, 0, -1)
-            entry["value"] = [_encode_bytes(v) for v in vals]
-        elif key_type_str == "set":
-            vals = list(r.smembers(key))
-            # Sort deterministically by raw bytes.
-            vals.sort()
-            entry["value"] = [_encode_bytes(v) for v in vals]
-        elif key_type_str == "zset":
-            vals = r.zrange(key, 0, -1, withscores=True)
-            entry["value"] = [{"member": _encode_bytes(m), "score": s} for m, s in vals]
-        elif key_type_str == "stream":
-            # XRANGE can be expensive; still better than dumping raw encoding for most cases.
-            items = r.xrange(key, min="-", max="+")
-            entry["value"] = [
-                {
-                    "id": _encode_scalar(item_id),
-                    "fields": [{"field": _encode_bytes(f), "value": _encode_bytes(v)} for f, v in fields],
-                }
-                for item_id, fields in items
-            ]
+
+def _collect(pipe: "redis.client.Pipeline", encode: Callable[[Any], Any]) -> List[Any]:
+    # Execute a pipeline holding one command per key and encode each reply;
+    # a failed key yields its exception instead of a value.
+    values: List[Any] = []
+    for reply in pipe.execute(raise_on_error=False):
+        if isinstance(reply, Exception):
+            values.append(reply)
+            continue
+        try:
+            values.append(encode(reply))
+        except Exception as e:
+            values.append(e)
+    return values
+
+
+def _read_string(r: "redis.Redis", keys: List[bytes], enc: _Encoder) -> List[Any]:
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.get(key)
+    return _collect(pipe, enc)
+
+
+def _read_hash(r: "redis.Redis", keys: List[bytes], enc: _Encoder) -> List[Any]:
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    return _collect(pipe, functools.partial(_encode_hash, enc=enc))
+
+
+def _read_list(r: "redis.Redis", keys: List[bytes], enc: _Encoder) -> List[Any]:
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.lrange(key, 0, -1)
+    return _collect(pipe, functools.partial(_encode_list, enc=enc))
+
+
+def _read_set(r: "redis.Redis", keys: List[bytes], enc: _Encoder) -> List[Any]:
+    # Sets can be arbitrarily large, so they are walked with SSCAN rather than
+    # pulled whole with SMEMBERS. The first page of every set goes out in one
+    # pipeline; only sets with pages left (cursor != 0) are followed up.
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.sscan(key, 0, count=5000)
+    values: List[Any] = []
+    for key, reply in zip(keys, pipe.execute(raise_on_error=False)):
+        if isinstance(reply, Exception):
+            values.append(reply)
+            continue
+        try:
+            cursor, page = reply
+            members = set(page)
+            while cursor != 0:
+                cursor, page = r.sscan(key, cursor, count=5000)
+                members.update(page)
+            # SSCAN may repeat a member, hence the set(); sort by raw bytes.
+            values.append([enc(v) for v in sorted(members)])
+        except Exception as e:
+            values.append(e)
+    return values
+
+
+def _read_zset(r: "redis.Redis", keys: List[bytes], enc: _Encoder) -> List[Any]:
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.zrange(key, 0, -1, withscores=True)
+    return _collect(pipe, functools.partial(_encode_zset, enc=enc))
+
+
+def _iter_stream_windows(
+    r: "redis.Redis", key: bytes, first: List[Dict[str, Any]], last_id: bytes, enc: _Encoder, batch: int
+) -> Iterator[List[Dict[str, Any]]]:
+    yield first
+    for items in _iter_xrange(r, key, batch, start=_next_stream_id(last_id)):
+        yield _encode_stream(items, enc)
+
+
+def _read_stream(r: "redis.Redis", keys: List[bytes], enc: _Encoder, batch: int = 1000) -> List[Any]:
+    # Likewise for streams, paged with XRANGE ... COUNT: the first window of
+    # every stream is pipelined. A stream that fills it gets an iterator of
+    # encoded windows instead of a list; _write_entry pages through it while
+    # writing, so at most one window of that stream is in memory at a time.
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.xrange(key, min="-", max="+", count=batch)
+    values: List[Any] = []
+    for key, items in zip(keys, pipe.execute(raise_on_error=False)):
+        if isinstance(items, Exception):
+            values.append(items)
+            continue
+        try:
+            value: Any = _encode_stream(items, enc)
+            if len(items) == batch:
+                value = _iter_stream_windows(r, key, value, items[-1][0], enc, batch)
+            values.append(value)
+        except Exception as e:
+            values.append(e)
+    return values
+
+
+def _read_unknown(r: "redis.Redis", keys: List[bytes], enc: _Encoder) -> List[Any]:
+    # Unknown/module types: store raw DUMP payload so data isn't lost.
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.dump(key)
+    return _collect(pipe, _encode_dump)
+
+
+# Per-type readers. Each one reads a bucket of keys that share the type and
+# returns one item per key: the encoded value, or the exception raised for it.
+_HANDLERS: Dict[str, Callable[["redis.Redis", List[bytes], _Encoder], List[Any]]] = {
+    "string": _read_string,
+    "hash": _read_hash,
+    "list": _read_list,
+    "set": _read_set,
+    "zset": _read_zset,
+    "stream": _read_stream,
+}
+
+
+def _read_key_entries(
+    r: "redis.Redis",
+    keys: List[bytes],
+    *,
+    assume_string: bool = False,
+    enc: _Encoder = _encode_bytes,
+) -> List[Dict[str, Any]]:
+    # Pass 1: TYPE and PTTL for the whole batch in one round trip. With
+    # assume_string, optimistically GET instead of TYPE: for string-only dumps
+    # that is the value already, and saves the pass 2 round trip.
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        if assume_string:
+            pipe.get(key)
         else:
-            # Unknown/module types: store raw DUMP payload so data isn't lost.
-            payload = r.dump(key)
-            entry["value"] = {
-                "encoding": "redis-dump-base64",
-                "data": _b64(payload) if payload is not None else None,
-            }
-    except Exception as e:
-        entry["error"] = str(e)
+            pipe.type(key)
+        pipe.pttl(key)
+    replies = pipe.execute(raise_on_error=False)
+    key_types: List[Any] = replies[0::2]
+
+    prefetched: Dict[int, bytes] = {}
+    if assume_string:
+        values, key_types = key_types, [b"string"] * len(keys)
+        # WRONGTYPE (or any other error) means it isn't a string; None means
+        # it vanished. Either way, learn its real type and read it normally.
+        fallback: List[int] = []
+        for i, value in enumerate(values):
+            if value is None or isinstance(value, Exception):
+                fallback.append(i)
+            else:
+                prefetched[i] = value
+        if fallback:
+            pipe = r.pipeline(transaction=False)
+            for i in fallback:
+                pipe.type(keys[i])
+            for i, key_type in zip(fallback, pipe.execute(raise_on_error=False)):
+                key_types[i] = key_type
+
+    entries: List[Dict[str, Any]] = []
+    buckets: Dict[str, List[Tuple[bytes, Dict[str, Any]]]] = {}
+    for i, (key, key_type, pttl_reply) in enumerate(zip(keys, key_types, replies[1::2])):
+        if isinstance(key_type, Exception):
+            raise key_type
+        if isinstance(key_type, bytes):
+            key_type_str = key_type.decode("utf-8", errors="replace")
+        else:
+            key_type_str = str(key_type)
 
-    return entry
+        ttl_ms: Optional[int]
+        try:
+            pttl = int(pttl_reply)
+            ttl_ms = None if pttl < 0 else pttl
+        except Exception:
+            ttl_ms = None
+
+        entry: Dict[str, Any] = {
+            "key": _encode_key(key, enc),
+            "type": key_type_str,
+            "ttl_ms": ttl_ms,
+        }
+        entries.append(entry)
+        if i in prefetched:
+            entry["value"] = enc(prefetched[i])
+        else:
+            buckets.setdefault(key_type_str, []).append((key, entry))
+
+    # Pass 2: one pipeline per type bucket for the values.
+    for key_type_str, items in buckets.items():
+        handler = _HANDLERS.get(key_type_str, _read_unknown)
+        values = handler(r, [key for key, _ in items], enc)
+        for (_, entry), value in zip(items, values):
+            if isinstance(value, Exception):
+                entry["error"] = str(value)
+            else:
+                entry["value"] = value
+
+    return entries
+
+
+def _connect(unix_socket: str, db: int = 0) -> "redis.Redis":
+    # A 1 MiB read size lets big replies be pulled in with few recv() calls.
+    # The pool already reuses one connection for a single-threaded caller.
+    return redis.Redis(
+        unix_socket_path=unix_socket,
+        db=db,
+        decode_responses=False,
+        socket_read_size=1 << 20,
+        socket_connect_timeout=5,
+    )
 
 
-def export_rdb_to_json(*, rdb_path: str, out_path: str, redis_server: str) -> None:
+def _write_entry(f: IO[bytes], entry: Dict[str, Any]) -> None:
+    # Write one item of a DB's "entries" array (nesting level 4).
+    value = entry.get("value")
+    if not isinstance(value, Iterator):
+        f.write(indent(json_dumps(entry), 4))
+        return
+    # A long stream (see _read_stream): serialize the entry with an empty
+    # "value" (always the last field), strip the trailing '[]\n}' to reopen
+    # that array and append the stream items window by window at level 6.
+    head = {k: v for k, v in entry.items() if k != "value"}
+    head["value"] = []
+    f.write(indent(json_dumps(head)[:-4], 4) + b"[")
+    n = 0
+    for window in value:
+        for item in window:
+            f.write(b",\n            " if n else b"\n            ")
+            f.write(indent(json_dumps(item), 6))
+            n += 1
+    f.write(b"\n          ]\n        }" if n else b"]\n        }")
+
+
+def _export_one_db(
+    unix_socket: str,
+    dbi: int,
+    f: IO[bytes],
+    pattern: bytes = b"*",
+    assume_string: bool = False,
+    compact_encoding: bool = False,
+) -> int:
+    """
+    Stream one DB's "entries" array into f as each SCAN batch is read.
+
+    The array is laid out for the output document at db.<dbi>.entries.
+    Returns the number of entries written.
+    """
+    # Each worker owns its connection; the DB is picked at connect time, so no SELECT.
+    enc = _encode_bytes_compact if compact_encoding else _encode_bytes
+    r = _connect(unix_socket, db=dbi)
+    try:
+        n = 0
+        f.write(b"[")
+        for keys in _scan_keys(r, pattern=pattern):
+            for entry in _read_key_entries(r, keys, assume_string=assume_string, enc=enc):
+                f.write(b",\n        " if n else b"\n        ")
+                _write_entry(f, entry)
+                n += 1
+        f.write(b"\n      ]" if n else b"]")
+        return n
+    finally:
+        r.close()
+
+
+def _export_db_to_part(part_path: str, export: Callable[[int, IO[bytes]], int], dbi: int) -> int:
+    with open(part_path, "wb") as f:
+        return export(dbi, f)
+
+
+def _write_document(
+    f: IO[bytes], meta: Dict[str, Any], dbs: List[int], write_entries: Callable[[int, IO[bytes]], Any]
+) -> None:
+    """
+    Write {"meta": ..., "db": {...}}, with write_entries(dbi, f) writing each
+    DB's "entries" array in place.
+
+    The layout matches json.dump(..., indent=2) of the full document.
+    """
+    f.write(b'{\n  "meta": ' + indent(json_dumps(meta), 1) + b',\n  "db": {')
+    for i, dbi in enumerate(dbs):
+        f.write(b",\n" if i else b"\n")
+        f.write(b'    "%d": {\n      "entries": ' % dbi)
+        write_entries(dbi, f)
+        f.write(b"\n    }")
+    f.write(b"\n  }\n}")
+
+
+def _write_dbs_concurrently(
+    f: IO[bytes],
+    meta: Dict[str, Any],
+    dbs: List[int],
+    export: Callable[[int, IO[bytes]], int],
+    parts_dir: str,
+) -> None:
+    # Export the logical DBs concurrently, one connection per DB. Each worker
+    # streams its entries to a part file, and the parts are spliced into the
+    # output in DB order, so no DB is ever held in memory whole. The parts sit
+    # next to the output rather than in /tmp, which is often RAM-backed tmpfs.
+    with tempfile.TemporaryDirectory(prefix=".rdb_to_json_", dir=parts_dir) as tmp:
+        parts = {dbi: os.path.join(tmp, f"db{dbi}.part") for dbi in dbs}
+        with ThreadPoolExecutor(max_workers=min(8, len(dbs))) as ex:
+            futures = {dbi: ex.submit(_export_db_to_part, parts[dbi], export, dbi) for dbi in dbs}
+
+            def splice(dbi: int, out: IO[bytes]) -> None:
+                futures[dbi].result()
+                with open(parts[dbi], "rb") as part:
+                    shutil.copyfileobj(part, out, 1 << 20)
+
+            _write_document(f, meta, dbs, splice)
+
+
+def export_rdb_to_json(
+    *,
+    rdb_path: str,
+    out_path: str,
+    redis_server: str,
+    key_pattern: str = "*",
+    assume_string: bool = False,
+    compact_encoding: bool = False,
+) -> None:
     if not os.path.exists(rdb_path):
         raise FileNotFoundError(rdb_path)
 
-    port = _pick_free_port()
     redis_ver = _redis_server_version(redis_server)
     if redis_ver is None:
         raise RuntimeError(
@@ -255,45 +636,48 @@ def export_rdb_to_json(*, rdb_path: str, out_path: str, redis_server: str) -> No
         )
 
     with tempfile.TemporaryDirectory(prefix="rdb_to_json_") as tmp:
-        proc = _start_redis_for_rdb(redis_server=redis_server, rdb_path=rdb_path, port=port, work_dir=tmp)
+        unix_socket = os.path.join(tmp, "redis.sock")
+        proc = _start_redis_for_rdb(
+            redis_server=redis_server, rdb_path=rdb_path, unix_socket=unix_socket, work_dir=tmp
+        )
         try:
-            r = redis.Redis(host="127.0.0.1", port=port, db=0, decode_responses=False)
             try:
-                _wait_for_redis_ready(r, timeout_s=20.0)
-            except Exception:
-                # Try to surface redis-server stderr for the common "RDB version" mismatch case.
-                try:
-                    proc.poll()
-                    err = (proc.stderr.read() if proc.stderr else "")  # type: ignore[union-attr]
-                    out = (proc.stdout.read() if proc.stdout else "")  # type: ignore[union-attr]
-                except Exception:
-                    err, out = "", ""
+                _wait_for_redis_ready(proc, timeout_s=20.0)
+            except RuntimeError as e:
+                # Surface redis-server output for the common "RDB version" mismatch case.
                 raise RuntimeError(
                     "Failed to start redis-server or load the RDB.\n\n"
                     f"redis-server --version:\n{redis_ver}\n\n"
                     "redis-server output:\n"
-                    f"{out}{err}\n\n"
+                    f"{e}\n\n"
                     "If you see something like \"Can't handle RDB format version X\", "
                     "you need a newer redis-server to load this dump."
                 )
+            r = _connect(unix_socket)
 
             meta = {
                 "source_rdb": os.path.abspath(rdb_path),
                 "exported_at_utc": _utc_now_iso(),
                 "redis_server_version": redis_ver,
+                "key_pattern": key_pattern,
+                "compact_encoding": compact_encoding,
             }
 
-            result: Dict[str, Any] = {"meta": meta, "db": {}}
             dbs = _collect_db_indexes(r)
-            for dbi in dbs:
-                r.execute_command("SELECT", dbi)
-                entries = []
-                for key in _scan_keys(r):
-                    entries.append(_read_key_entry(r, key))
-                result["db"][str(dbi)] = {"entries": entries}
-
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            export = functools.partial(
+                _export_one_db,
+                unix_socket,
+                pattern=key_pattern.encode("utf-8"),
+                assume_string=assume_string,
+                compact_encoding=compact_encoding,
+            )
+            with atomic_output(out_path) as f:
+                if len(dbs) == 1:
+                    # The common case: nothing to overlap, so stream the one DB
+                    # straight into the output.
+                    _write_document(f, meta, dbs, export)
+                else:
+                    _write_dbs_concurrently(f, meta, dbs, export, os.path.dirname(os.path.abspath(out_path)))
         finally:
             # Ensure the temporary redis-server is stopped.
             try:
@@ -316,9 +700,32 @@ def main(argv: Optional[List[str]] = None) -> int:
         default="redis-server",
         help="Path to redis-server binary (default: redis-server)",
     )
+    p.add_argument(
+        "--key-pattern",
+        default="*",
+        help="Only export keys matching this SCAN MATCH glob, e.g. 'chat:session_*' (default: *)",
+    )
+    p.add_argument(
+        "--assume-string",
+        action="store_true",
+        help="Read each key with GET before asking its TYPE; faster when (nearly) all keys are strings",
+    )
+    p.add_argument(
+        "--compact-encoding",
+        action="store_true",
+        help='Emit UTF-8 keys/values as bare strings and binary ones as {"b64": ...} '
+        '(default: {"encoding": ..., "data": ...} objects)',
+    )
     args = p.parse_args(argv)
 
-    export_rdb_to_json(rdb_path=args.rdb, out_path=args.out, redis_server=args.redis_server)
+    export_rdb_to_json(
+        rdb_path=args.rdb,
+        out_path=args.out,
+        redis_server=args.redis_server,
+        key_pattern=args.key_pattern,
+        assume_string=args.assume_string,
+        compact_encoding=args.compact_encoding,
+    )
     return 0
 
 
@@ -0,0 +1,307 @@
+"""
+Checks for rdb_to_json.py and dump_to_conversations.py, run against fakeredis
+and small temp files. Streamed output must stay byte-identical to a single
+json.dump(..., ensure_ascii=False, indent=2) of the whole document.
+
+Run with: python3 -m pytest -q
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import dump_to_conversations as d2c
+
+
+def _stdlib_layout(doc):
+    return json.dumps(doc, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _session(key, value):
+    return {
+        "key": {"encoding": "utf-8", "data": key},
+        "type": "string",
+        "value": {"encoding": "utf-8", "data": value},
+    }
+
+
+def _convert(tmp_path, entries, *args):
+    in_path, out_path = tmp_path / "dump.json", tmp_path / "conversations.json"
+    in_path.write_text(json.dumps({"db": {"0": {"entries": entries}}}), encoding="utf-8")
+    assert d2c.main(["--in", str(in_path), "--out", str(out_path), *args]) == 0
+    return out_path.read_bytes()
+
+
+def test_conversations_match_stdlib_layout(tmp_path):
+    sessions = {
+        "a": '[{"role": "user", "content": "h\u00e9llo\\n", "meta": {"n": [1, 2.5, null]}}]',
+        "b": '[{"role": "assistant", "content": "ok"}, {"role": "user", "content": ""}]',
+        "empty": "[]",
+    }
+    entries = [_session("chat:session_" + k, v) for k, v in sessions.items()]
+    entries.append(_session("other:key", sessions["a"]))
+
+    expected = [
+        {"session_id": k, "conversation": json.loads(v)} for k, v in sessions.items() if k != "empty"
+    ]
+    assert _convert(tmp_path, entries) == _stdlib_layout(expected)
+
+
+def test_conversations_empty_output(tmp_path):
+    assert _convert(tmp_path, []) == _stdlib_layout([])
+
+
+def test_session_prefixes_longest_match():
+    conversation = '[{"role": "user", "content": "x"}]'
+    keys = ["chat:session_a", "chat:b", "support:session_c", "chat:session_", "chat:", "other:d"]
+    entries = [_session(k, conversation) for k in keys]
+    stats = {"skipped": 0, "not_session_key": 0}
+
+    prefixes = ("chat:", "support:session_", "chat:session_")
+    found = list(d2c._iter_session_entries(iter(entries), stats, prefixes))
+    # "chat:session_a" resolves to the longer prefix; "chat:session_" has an
+    # empty id under it and is not re-read as id "session_" under "chat:".
+    assert [session_id for session_id, _ in found] == ["a", "b", "c"]
+    assert stats == {"skipped": 0, "not_session_key": 3}
+
+
+def test_session_prefix_option(tmp_path):
+    conversation = '[{"role": "user", "content": "x"}]'
+    entries = [_session(k, conversation) for k in ("chat:session_a", "support:session_b", "other:c")]
+    args = ["--session-prefix", "support:session_", "--session-prefix", "chat:session_"]
+    expected = [
+        {"session_id": session_id, "conversation": json.loads(conversation)} for session_id in ("a", "b")
+    ]
+    assert _convert(tmp_path, entries, *args) == _stdlib_layout(expected)
+
+
+def test_conversations_keep_values_orjson_would_change(tmp_path):
+    deep = "[" * 300 + "]" * 300
+    sessions = {
+        "wide": '[{"role": "user", "content": "x", "id": 123456789012345678901234567890}]',
+        "floats": '[{"role": "user", "content": "x", "f": [1e-07, 1e16, 0.00001, 1.5E300]}]',
+        "nan": '[{"role": "user", "content": "x", "f": NaN, "g": -Infinity}]',
+        # Parses fine with orjson, but is too deep for orjson.dumps.
+        "deep": '[{"role": "user", "content": "x", "d": %s}]' % deep,
+    }
+    entries = [_session("chat:session_" + k, v) for k, v in sessions.items()]
+
+    expected = [{"session_id": k, "conversation": json.loads(v)} for k, v in sessions.items()]
+    assert _convert(tmp_path, entries) == _stdlib_layout(expected)
+
+
+def test_load_session_fast_path():
+    # ensure_ascii escapes such as \u00e9 are text, not exponents.
+    raw = '[{"role": "user", "content": "caf\\u00e9 at 10:30"}]'
+    assert d2c._load_session(raw) == (json.loads(raw), d2c.orjson is not None)
+    for raw in ("[1e5]", '{"a": -0.00001}', "[1, 12345678901234567890]", "[1, 2.5E-3]"):
+        assert d2c._load_session(raw) == (json.loads(raw), False)
+
+
+@pytest.mark.parametrize("entries", ['{"a": 1}', '"x"', "3"])
+def test_conversations_reject_non_list_entries(tmp_path, entries):
+    in_path, out_path = tmp_path / "dump.json", tmp_path / "conversations.json"
+    in_path.write_text('{"meta": {}, "db": {"0": {"entries": %s}}}' % entries, encoding="utf-8")
+    out_path.write_bytes(b"previous")
+    with pytest.raises(SystemExit, match="is not a list"):
+        d2c.main(["--in", str(in_path), "--out", str(out_path)])
+    # The existing output is left alone, and no temp file is left behind.
+    assert out_path.read_bytes() == b"previous"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["conversations.json", "dump.json"]
+
+
+@pytest.mark.skipif(not hasattr(os, "writev"), reason="needs os.writev")
+def test_write_chunks_resumes_after_short_writes(tmp_path, monkeypatch):
+    real_writev = os.writev
+
+    def short_writev(fd, buffers):
+        # Write at most 3 bytes per call, often splitting a chunk.
+        return real_writev(fd, [b"".join(buffers)[:3]])
+
+    monkeypatch.setattr(os, "writev", short_writev)
+    chunks = [b"[", b"", b"\n  abcdef", b",\n", b"x" * 10, b"\n]"]
+    path = tmp_path / "out"
+    with open(path, "wb") as f:
+        d2c._write_chunks(f, list(chunks))
+    assert path.read_bytes() == b"".join(chunks)
+
+
+def test_rdb_document_matches_stdlib_layout(tmp_path, monkeypatch):
+    rdb = pytest.importorskip("rdb_to_json")
+    fakeredis = pytest.importorskip("fakeredis")
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        rdb, "_connect", lambda unix_socket, db=0, **kw: fakeredis.FakeRedis(server=server, db=db)
+    )
+    r0 = fakeredis.FakeRedis(server=server, db=0)
+    r0.set(b"s", "héllo\nworld")
+    r0.set(b"bin", b"\xff\x00")
+    r0.hset(b"h", mapping={"f": "v"})
+    r0.rpush(b"l", "a", "b")
+    r0.sadd(b"set", "x", "y")
+    r0.zadd(b"z", {"m": 1.5, "n": float("inf")})
+    r0.xadd(b"st", {"f": "1"})
+    # Streams longer than one XRANGE window are paged while being written.
+    for i in range(2500):
+        r0.xadd(b"long", {"i": str(i)})
+    for i in range(1000):
+        r0.xadd(b"full", {"i": str(i)})
+
+    meta = {"source_rdb": "dump.rdb", "dbs": [0, 3]}
+    out_path = tmp_path / "dump.json"
+    with open(out_path, "wb") as f:
+        rdb._write_document(f, meta, [0, 3], lambda dbi, out: rdb._export_one_db("unused.sock", dbi, out))
+
+    data = out_path.read_bytes()
+    doc = json.loads(data)
+    assert doc["db"]["3"]["entries"] == []
+    entries = {e["key"]["data"]: e for e in doc["db"]["0"]["entries"]}
+    assert len(entries) == 9
+    assert [item["fields"][0]["value"]["data"] for item in entries["long"]["value"]] == [
+        str(i) for i in range(2500)
+    ]
+    assert len(entries["full"]["value"]) == 1000
+    assert data == _stdlib_layout(doc)
+
+
+@pytest.mark.parametrize("dbs", [[0], [0, 3]])
+def test_export_rdb_to_json_layout(tmp_path, monkeypatch, dbs):
+    rdb = pytest.importorskip("rdb_to_json")
+    fakeredis = pytest.importorskip("fakeredis")
+
+    # Fake the redis-server lifecycle; everything after it runs for real.
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        rdb, "_connect", lambda unix_socket, db=0, **kw: fakeredis.FakeRedis(server=server, db=db)
+    )
+    monkeypatch.setattr(rdb, "_redis_server_version", lambda redis_server: "fake")
+    monkeypatch.setattr(rdb, "_start_redis_for_rdb", lambda **kw: type("P", (), {"poll": lambda self: 0})())
+    monkeypatch.setattr(rdb, "_wait_for_redis_ready", lambda proc, timeout_s: None)
+    monkeypatch.setattr(rdb, "_collect_db_indexes", lambda r: dbs)
+    for dbi in dbs:
+        r = fakeredis.FakeRedis(server=server, db=dbi)
+        r.set(b"chat:session_%d" % dbi, b"[]")
+        r.rpush(b"l", "a")
+
+    rdb_path, out_path = tmp_path / "dump.rdb", tmp_path / "dump.json"
+    rdb_path.write_bytes(b"")
+    out_path.write_bytes(b"previous")
+    rdb.export_rdb_to_json(rdb_path=str(rdb_path), out_path=str(out_path), redis_server="redis-server")
+
+    data = out_path.read_bytes()
+    doc = json.loads(data)
+    assert [int(dbi) for dbi in doc["db"]] == dbs
+    assert all(len(db["entries"]) == 2 for db in doc["db"].values())
+    assert data == _stdlib_layout(doc)
+    # Part files (if any) are cleaned up, as is the output's temp file.
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dump.json", "dump.rdb"]
+
+
+def test_compact_encoding_round_trip(tmp_path, monkeypatch):
+    rdb = pytest.importorskip("rdb_to_json")
+    fakeredis = pytest.importorskip("fakeredis")
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        rdb, "_connect", lambda unix_socket, db=0, **kw: fakeredis.FakeRedis(server=server, db=db)
+    )
+    conversation = '[{"role": "user", "content": "h\u00e9"}]'
+    r = fakeredis.FakeRedis(server=server)
+    r.set(b"chat:session_text", conversation)
+    r.set(b"\xff\xfe", conversation)  # binary key
+    r.set(b"bin", b"\xff\x00")
+    r.hset(b"h", mapping={"f": "v"})
+
+    dump_path = tmp_path / "dump.json"
+    with open(dump_path, "wb") as f:
+        rdb._write_document(
+            f, {}, [0], lambda dbi, out: rdb._export_one_db("unused.sock", dbi, out, compact_encoding=True)
+        )
+    data = dump_path.read_bytes()
+    doc = json.loads(data)
+    assert data == _stdlib_layout(doc)
+    entries = {json.dumps(e["key"]): e for e in doc["db"]["0"]["entries"]}
+    assert entries['"chat:session_text"']["value"] == conversation
+    assert entries['{"b64": "//4="}']["value"] == conversation
+    assert entries['"bin"']["value"] == {"b64": "/wA="}
+    assert entries['"h"']["value"] == [{"field": "f", "value": "v"}]
+
+    # dump_to_conversations reads bare-string values and {"b64": ...} keys.
+    out_path = tmp_path / "conversations.json"
+    args = ["--in", str(dump_path), "--out", str(out_path), "--session-prefix", "chat:session_"]
+    assert d2c.main(args + ["--session-prefix", "base64:"]) == 0
+    conversations = json.loads(out_path.read_bytes())
+    assert sorted(c["session_id"] for c in conversations) == ["//4=", "text"]
+    assert all(c["conversation"] == json.loads(conversation) for c in conversations)
+
+
+def test_assume_string_matches_default_path():
+    rdb = pytest.importorskip("rdb_to_json")
+    fakeredis = pytest.importorskip("fakeredis")
+
+    r = fakeredis.FakeRedis()
+    r.set(b"s1", "a")
+    r.set(b"s2", b"\xff", ex=100)
+    r.set(b"empty", b"")
+    r.hset(b"h", mapping={"f": "v"})
+    r.rpush(b"l", "x")
+    r.sadd(b"set", "m")
+    r.zadd(b"z", {"m": 2.0})
+    r.xadd(b"st", {"f": "1"})
+    keys = [b"s1", b"h", b"gone", b"s2", b"l", b"set", b"empty", b"z", b"st"]
+
+    def without_ttl(entries):
+        return [{k: v for k, v in e.items() if k != "ttl_ms"} for e in entries]
+
+    default = rdb._read_key_entries(r, keys)
+    assumed = rdb._read_key_entries(r, keys, assume_string=True)
+    assert without_ttl(assumed) == without_ttl(default)
+    types = ["string", "hash", "none", "string", "list", "set", "string", "zset", "stream"]
+    assert [e["type"] for e in assumed] == types
+
+
+def _fake_server(script):
+    return subprocess.Popen(
+        [sys.executable, "-c", script], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    )
+
+
+@pytest.mark.parametrize(
+    "ready_line",
+    [
+        "1:M 14 Oct 2026 12:00:00.000 * Ready to accept connections tcp",
+        "1:M 14 Oct 12:00:00.000 * The server is now ready to accept connections on port 6379",
+    ],
+)
+def test_wait_for_redis_ready_log_line(ready_line):
+    rdb = pytest.importorskip("rdb_to_json")
+    # The fake server keeps running after the line, so only the match can return.
+    proc = _fake_server(
+        "import time; print('1:M * DB loaded from disk', flush=True); print(%r, flush=True); time.sleep(60)"
+        % ready_line
+    )
+    try:
+        rdb._wait_for_redis_ready(proc, timeout_s=10.0)
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def test_wait_for_redis_ready_reports_exit():
+    rdb = pytest.importorskip("rdb_to_json")
+    proc = _fake_server("import sys; print(\"Can't handle RDB format version 12\"); sys.exit(1)")
+    with pytest.raises(RuntimeError, match="(?s)exited with code 1.*RDB format version 12"):
+        rdb._wait_for_redis_ready(proc, timeout_s=10.0)
+
+
+def test_next_stream_id():
+    rdb = pytest.importorskip("rdb_to_json")
+    assert rdb._next_stream_id(b"1526919030474-55") == b"1526919030474-56"
+    assert rdb._next_stream_id(b"5-%d" % (2**64 - 2)) == b"5-%d" % (2**64 - 1)
+    assert rdb._next_stream_id(b"5-%d" % (2**64 - 1)) == b"6-0"